@@ -84,6 +84,9 @@ class AdministrationController(BaseController):
     def get_cluster_status(self):
         return [server.status for server in db.fetch_all("server")]
 
+    def get_changelog_metrics(self):
+        return {**db.changelog_metrics, "queue_depth": db.changelog_queue.qsize()}
+
     def get_exported_services(self):
         return [f for f in listdir(self.path / "files" / "services") if ".tgz" in f]
 
@@ -141,6 +144,7 @@ class AdministrationController(BaseController):
     def migration_import(self, folder="migrations", **kwargs):
         status, models = "Import successful.", kwargs["import_export_types"]
         empty_database = kwargs.get("empty_database_before_import", False)
+        changes = db.track_changes()
         if empty_database:
             db.delete_all(*models)
         relations = defaultdict(lambda: defaultdict(dict))
@@ -195,9 +199,10 @@ class AdministrationController(BaseController):
             for model in ("access", "service", "workflow_edge"):
                 for instance in db.fetch_all(model):
                     instance.update()
+        db.session.flush()
+        changes = db.untrack_changes(changes)
         if not kwargs.get("skip_pool_update"):
-            for pool in db.fetch_all("pool"):
-                pool.compute_pool()
+            self.update_pools_from_changes(changes)
         self.log("info", status)
         return status
 
@@ -1,11 +1,14 @@
-from collections import defaultdict
+from asyncio import new_event_loop, run_coroutine_threadsafe, Semaphore
+from collections import defaultdict, OrderedDict
 from flask_login import current_user
 from napalm._SUPPORTED_DRIVERS import SUPPORTED_DRIVERS
 from netmiko.ssh_dispatcher import CLASS_MAPPER, FILE_TRANSFER_MAP
 from operator import itemgetter
 from pathlib import Path
 from re import search, sub
-from threading import Thread
+from redis.exceptions import ConnectionError, TimeoutError
+from threading import Condition, Lock, Thread
+from time import sleep, time
 from uuid import uuid4
 from warnings import warn
 
@@ -56,8 +59,154 @@ class AutomationController(BaseController):
     }
     service_db = defaultdict(lambda: {"runs": 0})
     run_db = defaultdict(dict)
-    run_logs = defaultdict(lambda: defaultdict(list))
+    run_logs = defaultdict(dict)
+    run_logs_condition = Condition()
+    run_results = defaultdict(list)
+    run_results_lock = Lock()
     run_stop = defaultdict(bool)
+    run_async_results = defaultdict(dict)
+    run_code_cache = defaultdict(OrderedDict)
+    run_code_cache_lock = Lock()
+    event_loop = None
+    event_loop_lock = Lock()
+    service_semaphores = {}
+    connection_pool = OrderedDict()
+    connection_pool_lock = Lock()
+    pooled_connection_keys = {}
+    run_state_buffer = defaultdict(
+        lambda: {"set": {}, "increment": defaultdict(int), "append": defaultdict(list)}
+    )
+    run_state_lock = Lock()
+    run_state_flusher = None
+
+    def run_coroutine(self, coroutine):
+        with self.event_loop_lock:
+            if not self.event_loop:
+                self.event_loop = new_event_loop()
+                Thread(target=self.event_loop.run_forever, daemon=True).start()
+        return run_coroutine_threadsafe(coroutine, self.event_loop).result()
+
+    def service_semaphore(self, service_id):
+        if service_id not in self.service_semaphores:
+            limit = self.settings["automation"]["async_service_limit"]
+            self.service_semaphores[service_id] = Semaphore(limit)
+        return self.service_semaphores[service_id]
+
+    def checkout_connection(self, key):
+        with self.connection_pool_lock:
+            evicted_connections = self.evict_pooled_connections()
+            connection, _ = self.connection_pool.pop(key, (None, None))
+        for evicted_key, evicted_connection in evicted_connections:
+            self.close_pooled_connection(evicted_key, evicted_connection)
+        return connection
+
+    def release_connection(self, key, connection):
+        with self.connection_pool_lock:
+            self.connection_pool[key] = (connection, time())
+            evicted_connections = self.evict_pooled_connections()
+        for evicted_key, evicted_connection in evicted_connections:
+            self.close_pooled_connection(evicted_key, evicted_connection)
+
+    def evict_pooled_connections(self):
+        settings, now = self.settings["automation"]["connection_pool"], time()
+        evicted_connections = [
+            (key, self.connection_pool.pop(key)[0])
+            for key, (_, last_used) in list(self.connection_pool.items())
+            if now - last_used > settings["ttl"]
+        ]
+        while len(self.connection_pool) > settings["max_size"]:
+            key, (connection, _) = self.connection_pool.popitem(last=False)
+            evicted_connections.append((key, connection))
+        return evicted_connections
+
+    def close_pooled_connection(self, key, connection):
+        device, library = key[:2]
+        try:
+            connection.disconnect() if library == "netmiko" else connection.close()
+            self.log(
+                "info",
+                f"Closed pooled {library} connection to {device}",
+                change_log=False,
+            )
+        except Exception as exc:
+            self.log(
+                "error",
+                f"Error while closing pooled {library} connection to {device} ({exc})",
+                change_log=False,
+            )
+
+    def buffer_run_state(self, runtime, field, value, method=None):
+        with self.run_state_lock:
+            state = self.run_state_buffer[runtime]
+            if not method:
+                state["set"][field] = value
+                state["increment"].pop(field, None)
+            else:
+                state[method][field] += value if method == "increment" else [value]
+            if not self.run_state_flusher:
+                self.run_state_flusher = Thread(
+                    target=self.flush_run_state_periodically, daemon=True
+                )
+                self.run_state_flusher.start()
+
+    def flush_run_state_periodically(self):
+        while True:
+            sleep(self.settings["automation"]["state_flush_interval"])
+            self.flush_run_state()
+
+    def flush_run_state(self, runtime=None):
+        with self.run_state_lock:
+            if runtime:
+                state = self.run_state_buffer.pop(runtime, None)
+                buffer = {runtime: state} if state else {}
+            else:
+                buffer = dict(self.run_state_buffer)
+                self.run_state_buffer.clear()
+        if not buffer:
+            return
+        pipeline = self.redis_queue.pipeline(transaction=False)
+        for runtime, state in buffer.items():
+            key = f"{runtime}/state"
+            if state["set"]:
+                pipeline.hset(key, mapping=state["set"])
+            for field, value in state["increment"].items():
+                pipeline.hincrby(key, field, value)
+            for field, values in state["append"].items():
+                pipeline.sadd(f"{key}/lists", field)
+                pipeline.rpush(f"{key}/{field}", *values)
+        try:
+            pipeline.execute()
+        except (ConnectionError, TimeoutError) as exc:
+            self.log("error", f"Redis Queue Unreachable ({exc})", change_log=False)
+
+    def get_run_state(self, runtime):
+        self.flush_run_state(runtime)
+        key, state = f"{runtime}/state", {}
+        try:
+            pipeline = self.redis_queue.pipeline(transaction=False)
+            fields, lists = pipeline.hgetall(key).smembers(f"{key}/lists").execute()
+            if lists:
+                for field in lists:
+                    pipeline.lrange(f"{key}/{field}", 0, -1)
+                fields.update(zip(lists, pipeline.execute()))
+        except (ConnectionError, TimeoutError) as exc:
+            self.log("error", f"Redis Queue Unreachable ({exc})", change_log=False)
+            return state
+        for field, value in fields.items():
+            inner_store, (*path, last_key) = state, field.split("/")
+            for path_key in path:
+                inner_store = inner_store.setdefault(path_key, {})
+            if value in ("False", "True"):
+                value = value == "True"
+            inner_store[last_key] = value
+        return state
+
+    def delete_run_state(self, runtime):
+        self.flush_run_state(runtime)
+        key = f"{runtime}/state"
+        lists = self.redis("smembers", f"{key}/lists") or []
+        lists = (f"{key}/{field}" for field in lists)
+        self.redis("delete", key, f"{key}/lists", *lists)
 
     def add_edge(self, workflow_id, subtype, source, destination):
         now = self.get_time()
@@ -209,24 +358,34 @@ class AutomationController(BaseController):
             reverse=True,
         )
 
-    def get_service_logs(self, service, runtime, start_line):
+    def get_service_logs(self, service, runtime, line):
         log_instance = db.fetch(
             "service_log", allow_none=True, runtime=runtime, service_id=service
         )
-        number_of_lines = 0
         if log_instance:
             logs = log_instance.content
         else:
-            lines = (
-                self.log_queue(runtime, service, start_line=int(start_line), mode="get")
-                or []
-            )
-            number_of_lines, logs = len(lines), "\n".join(lines)
-        return {
-            "logs": logs,
-            "refresh": not log_instance,
-            "line": int(start_line) + number_of_lines,
-        }
+            lines, line = self.get_run_logs(runtime, service, line)
+            logs = "\n".join(lines)
+        return {"logs": logs, "refresh": not log_instance, "line": line}
+
+    def stream_service_logs(self, service, runtime, cursor):
+        timeout = self.settings["automation"]["log_stream_timeout"]
+        while True:
+            lines, cursor = self.get_run_logs(runtime, service, cursor, timeout)
+            if lines:
+                data = "\n".join(
+                    f"data: {line}" for line in "\n".join(lines).split("\n")
+                )
+                yield f"id: {cursor}\n{data}\n\n"
+                continue
+            db.session.rollback()
+            if db.fetch(
+                "service_log", allow_none=True, runtime=runtime, service_id=service
+            ):
+                yield "event: end\ndata: \n\n"
+                break
+            yield ": keep-alive\n\n"
 
     def get_service_state(self, path, runtime=None):
         service_id, state = path.split(">")[-1], None
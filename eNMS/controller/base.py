@@ -1,5 +1,6 @@
 from base64 import b64decode, b64encode
 from click import get_current_context
+from collections import deque
 from cryptography.fernet import Fernet
 from datetime import datetime
 from difflib import unified_diff
@@ -11,6 +12,7 @@ from flask_login import current_user
 from git import Repo
 from importlib import import_module
 from importlib.util import module_from_spec, spec_from_file_location
+from itertools import islice
 from json import load
 from logging.config import dictConfig
 from logging import getLogger, error, info
@@ -29,6 +31,7 @@ from sqlalchemy import and_
 from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from sqlalchemy.orm import aliased, configure_mappers
 from sys import path as sys_path
+from time import sleep
 from traceback import format_exc
 from uuid import getnode
 from warnings import warn
@@ -343,23 +346,48 @@ class BaseController:
         except (ConnectionError, TimeoutError) as exc:
             self.log("error", f"Redis Queue Unreachable ({exc})", change_log=False)
 
-    def log_queue(self, runtime, service, log=None, mode="add", start_line=0):
+    def log_queue(self, runtime, service, log):
+        retention, service = self.settings["automation"]["log_retention"], int(service)
         if self.redis_queue:
+            self.run_logs[runtime][service] = None
             key = f"{runtime}/{service}/logs"
-            self.run_logs[runtime][int(service)] = None
-            if mode == "add":
-                log = self.redis("lpush", key, log)
-            else:
-                log = self.redis("lrange", key, 0, -1)
-                if log:
-                    log = log[::-1][start_line:]
+            self.redis("xadd", key, {"log": log}, maxlen=retention, approximate=True)
         else:
-            if mode == "add":
-                return self.run_logs[runtime][int(service)].append(log)
-            else:
-                full_log = getattr(self.run_logs[runtime], mode)(int(service), [])
-                log = full_log[start_line:]
-        return log
+            with self.run_logs_condition:
+                if service not in self.run_logs[runtime]:
+                    logs = {"lines": deque(maxlen=retention), "count": 0}
+                    self.run_logs[runtime][service] = logs
+                self.run_logs[runtime][service]["lines"].append(log)
+                self.run_logs[runtime][service]["count"] += 1
+                self.run_logs_condition.notify_all()
+
+    def get_run_logs(self, runtime, service, cursor=None, timeout=0):
+        service = int(service)
+        if self.redis_queue:
+            key = f"{runtime}/{service}/logs"
+            for attempt in range(2 if timeout else 1):
+                if attempt:
+                    sleep(timeout)
+                streams = self.redis("xread", {key: cursor or "0"}) or []
+                if streams:
+                    entries = streams[0][1]
+                    return [entry["log"] for _, entry in entries], entries[-1][0]
+            return [], cursor or "0"
+        with self.run_logs_condition:
+            cursor, logs = int(cursor or 0), self.run_logs.get(runtime, {}).get(service)
+            if timeout and (not logs or logs["count"] <= cursor):
+                self.run_logs_condition.wait(timeout)
+                logs = self.run_logs.get(runtime, {}).get(service)
+            if not logs:
+                return [], cursor
+            first_line = logs["count"] - len(logs["lines"])
+            start = max(cursor - first_line, 0)
+            return list(islice(logs["lines"], start, None)), logs["count"]
+
+    def delete_run_logs(self, runtime):
+        services = self.run_logs.pop(runtime, {})
+        if self.redis_queue and services:
+            self.redis("delete", *(f"{runtime}/{service}/logs" for service in services))
 
     def delete_instance(self, model, instance_id):
         return db.delete(model, id=instance_id)
@@ -406,13 +434,10 @@ class BaseController:
         if logger:
             getattr(getLogger(logger), severity)(content)
         if change_log or logger and logger_settings.get("change_log"):
-            db.factory(
-                "changelog",
-                **{
-                    "severity": severity,
-                    "content": content,
-                    "user": user or getattr(current_user, "name", ""),
-                },
+            db.queue_changelog(
+                severity=severity,
+                content=content,
+                user=user or getattr(current_user, "name", ""),
             )
         return logger_settings
 
@@ -665,28 +690,24 @@ class BaseController:
         return input.translate(str.maketrans("", "", f"{punctuation} "))
 
     def update_database_configurations_from_git(self):
-        for dir in scandir(self.path / "network_data"):
-            device = db.fetch("device", allow_none=True, name=dir.name)
-            timestamp_path = Path(dir.path) / "timestamps.json"
-            if not device:
-                continue
-            try:
-                with open(timestamp_path) as file:
-                    timestamps = load(file)
-            except Exception:
-                timestamps = {}
-            for property in self.configuration_properties:
-                for timestamp, value in timestamps.get(property, {}).items():
-                    setattr(device, f"last_{property}_{timestamp}", value)
-                filepath = Path(dir.path) / property
-                if not filepath.exists():
+        with db.tracked_changes() as changes:
+            for dir in scandir(self.path / "network_data"):
+                device = db.fetch("device", allow_none=True, name=dir.name)
+                timestamp_path = Path(dir.path) / "timestamps.json"
+                if not device:
                     continue
-                with open(filepath) as file:
-                    setattr(device, property, file.read())
-        db.session.commit()
-        for pool in db.fetch_all("pool"):
-            if any(
-                getattr(pool, f"device_{property}")
-                for property in self.configuration_properties
-            ):
-                pool.compute_pool()
+                try:
+                    with open(timestamp_path) as file:
+                        timestamps = load(file)
+                except Exception:
+                    timestamps = {}
+                for property in self.configuration_properties:
+                    for timestamp, value in timestamps.get(property, {}).items():
+                        setattr(device, f"last_{property}_{timestamp}", value)
+                    filepath = Path(dir.path) / property
+                    if not filepath.exists():
+                        continue
+                    with open(filepath) as file:
+                        setattr(device, property, file.read())
+            db.session.commit()
+        self.update_pools_from_changes(changes)
@@ -190,27 +190,27 @@ class InventoryController(BaseController):
     def topology_import(self, file):
         book = open_workbook(file_contents=file.read())
         status = "Topology successfully imported."
-        for obj_type in ("device", "link"):
-            try:
-                sheet = book.sheet_by_name(obj_type)
-            except XLRDError:
-                continue
-            properties = sheet.row_values(0)
-            for row_index in range(1, sheet.nrows):
-                values = {}
-                for index, property in enumerate(properties):
-                    if not property:
-                        continue
-                    func = db.field_conversion[property_types.get(property, "str")]
-                    values[property] = func(sheet.row_values(row_index)[index])
+        with db.tracked_changes() as changes:
+            for obj_type in ("device", "link"):
                 try:
-                    db.factory(obj_type, **values).serialized
-                except Exception as exc:
-                    info(f"{str(values)} could not be imported ({str(exc)})")
-                    status = "Partial import (see logs)."
-            db.session.commit()
-        for pool in db.fetch_all("pool"):
-            pool.compute_pool()
+                    sheet = book.sheet_by_name(obj_type)
+                except XLRDError:
+                    continue
+                properties = sheet.row_values(0)
+                for row_index in range(1, sheet.nrows):
+                    values = {}
+                    for index, property in enumerate(properties):
+                        if not property:
+                            continue
+                        func = db.field_conversion[property_types.get(property, "str")]
+                        values[property] = func(sheet.row_values(row_index)[index])
+                    try:
+                        db.factory(obj_type, **values).serialized
+                    except Exception as exc:
+                        info(f"{str(values)} could not be imported ({str(exc)})")
+                        status = "Partial import (see logs)."
+                db.session.commit()
+        self.update_pools_from_changes(changes)
         self.log("info", status)
         return status
 
@@ -228,7 +228,15 @@ class InventoryController(BaseController):
 
     def update_all_pools(self):
         for pool in db.fetch_all("pool"):
-            pool.compute_pool()
+            pool.compute_pool(incremental=True)
+
+    def update_pools_from_changes(self, changes):
+        for pool in db.fetch_all("pool"):
+            if pool.id in changes["pool"]:
+                pool.compute_pool()
+            elif pool.depends_on(changes):
+                inserted = any(pool.compute(model) for model in changes["inserted"])
+                pool.compute_pool(incremental=not inserted)
 
     def view_filtering(self, **kwargs):
         return {
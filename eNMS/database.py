@@ -1,10 +1,14 @@
 from ast import literal_eval
 from atexit import register
+from collections import defaultdict
 from contextlib import contextmanager
+from datetime import datetime
 from flask_login import current_user
 from json import loads
 from logging import error
 from os import getenv
+from queue import Empty, Full, Queue
+from re import search
 from sqlalchemy import (
     Boolean,
     Column,
@@ -26,6 +30,7 @@ from sqlalchemy.ext.mutable import MutableDict, MutableList
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.collections import InstrumentedList
 from sqlalchemy.types import JSON
+from threading import Lock, Thread
 from time import sleep
 
 from eNMS.models import model_properties, models, property_types, relationships
@@ -40,6 +45,7 @@ class Database:
         self.dialect = self.database_url.split(":")[0]
         self.rbac_error = type("RbacError", (Exception,), {})
         self.private_properties_set = set()
+        self.change_trackers, self.change_trackers_lock = {}, Lock()
         self.configure_columns()
         self.engine = create_engine(
             self.database_url,
@@ -47,6 +53,7 @@ class Database:
             **self.engine.get(self.dialect, {}),
         )
         self.session = scoped_session(sessionmaker(autoflush=False, bind=self.engine))
+        self.init_changelog_writer()
         self.base = declarative_base(metaclass=self.create_metabase())
         self.configure_associations()
         self.configure_events()
@@ -115,6 +122,64 @@ class Database:
         self.Column = CustomColumn
 
     def configure_events(self):
+        if self.dialect == "sqlite":
+
+            @event.listens_for(self.engine, "connect")
+            def register_regexp(connection, _):
+                connection.create_function(
+                    "regexp",
+                    2,
+                    lambda regex, value: value is not None
+                    and bool(search(regex, str(value))),
+                )
+
+        @event.listens_for(self.session, "before_commit")
+        def write_changelog(session):
+            if self.dialect != "sqlite" or self.changelog_queue.empty():
+                return
+            while True:
+                entries = self.get_changelog_batch()
+                if not entries:
+                    break
+                session.bulk_insert_mappings(models["changelog"], entries)
+                self.changelog_metrics["written"] += len(entries)
+                for _ in entries:
+                    self.changelog_queue.task_done()
+
+        @event.listens_for(self.session, "after_flush")
+        def record_changes(session, _):
+            if not self.change_trackers:
+                return
+            changes, pool = defaultdict(set), models["pool"]
+            for instance in session.new | session.deleted:
+                if getattr(instance, "pool_model", False):
+                    model = instance.class_type
+                    changes[model] |= set(properties["filtering"][model])
+                    changes["inserted"].add(model)
+                elif isinstance(instance, pool) and instance in session.new:
+                    changes["pool"].add(instance.id)
+            for instance in session.dirty:
+                if getattr(instance, "pool_model", False):
+                    model = instance.class_type
+                    keys = properties["filtering"][model]
+                elif isinstance(instance, pool):
+                    model, keys = "pool", pool.filtering_properties
+                else:
+                    continue
+                state = inspect(instance)
+                for key in keys:
+                    if key in state.attrs and state.attrs[key].history.has_changes():
+                        changes[model].add(instance.id if model == "pool" else key)
+            if set(changes) & set(pool.models):
+                for model in pool.models:
+                    mapper = inspect(models[model])
+                    changes[model] |= {
+                        property
+                        for property in properties["filtering"][model]
+                        if property not in mapper.column_attrs
+                    }
+            self.record_changes(changes)
+
         @event.listens_for(self.base, "mapper_configured", propagate=True)
         def model_inspection(mapper, model):
             name = model.__tablename__
@@ -168,6 +233,19 @@ class Database:
             name = getattr(target, "name", str(target))
             app.log("info", f"DELETION: {target.type} '{name}'")
 
+        @event.listens_for(self.base, "before_insert", propagate=True)
+        @event.listens_for(self.base, "before_update", propagate=True)
+        def update_last_modified(mapper, connection, target):
+            if not hasattr(target, "last_modified") or not target.pool_model:
+                return
+            state = inspect(target)
+            if state.pending:
+                modified = not target.last_modified
+            else:
+                modified = state.session.is_modified(target, include_collections=False)
+            if modified:
+                target.last_modified = app.get_time()
+
         @event.listens_for(self.base, "before_update", propagate=True)
         def log_instance_update(mapper, connection, target):
             state, changelog = inspect(target), []
@@ -300,6 +378,32 @@ class Database:
                 f"with the following characteristics: {kwargs}"
             )
 
+    def track_changes(self):
+        changes = defaultdict(set)
+        with self.change_trackers_lock:
+            self.change_trackers[id(changes)] = changes
+        return changes
+
+    def record_changes(self, changes):
+        with self.change_trackers_lock:
+            for tracker in self.change_trackers.values():
+                for key, values in changes.items():
+                    tracker[key] |= set(values)
+
+    def untrack_changes(self, changes):
+        with self.change_trackers_lock:
+            self.change_trackers.pop(id(changes), None)
+        return changes
+
+    @contextmanager
+    def tracked_changes(self):
+        changes = self.track_changes()
+        try:
+            yield changes
+            self.session.flush()
+        finally:
+            self.untrack_changes(changes)
+
     def delete(self, model, **kwargs):
         instance = self.fetch(model, rbac="edit", **kwargs)
         return self.delete_instance(instance)
@@ -307,6 +411,19 @@ class Database:
     def fetch_all(self, model, **kwargs):
         return self.fetch(model, allow_none=True, all_matches=True, **kwargs)
 
+    def fetch_in(self, model, property, values, rbac="read", username=None):
+        values, chunk_size, instances = (
+            list(values),
+            self.transactions["chunk_size"],
+            [],
+        )
+        column = getattr(models[model], property)
+        for index in range(0, len(values), chunk_size):
+            chunk = values[index : index + chunk_size]
+            query = self.query(model, rbac, username=username)
+            instances.extend(query.filter(column.in_(chunk)).all())
+        return instances
+
     def objectify(self, model, object_list, **kwargs):
         return [self.fetch(model, id=object_id, **kwargs) for object_id in object_list]
 
@@ -409,7 +526,78 @@ class Database:
             setattr(table, property, column)
         return table
 
+    def init_changelog_writer(self):
+        self.changelog_queue = Queue(self.transactions["changelog"]["queue_size"])
+        self.changelog_session = sessionmaker(bind=self.engine)()
+        self.changelog_lock, self.changelog_writer = Lock(), None
+        self.changelog_metrics = {"queued": 0, "written": 0, "failed": 0, "waits": 0}
+
+    def queue_changelog(self, **entry):
+        entry.update(type="changelog", time=str(datetime.now()))
+        try:
+            self.changelog_queue.put_nowait(entry)
+        except Full:
+            self.changelog_metrics["waits"] += 1
+            self.changelog_queue.put(entry)
+        self.changelog_metrics["queued"] += 1
+        if self.dialect == "sqlite" or self.changelog_writer:
+            return
+        with self.changelog_lock:
+            if not self.changelog_writer:
+                self.changelog_writer = Thread(
+                    target=self.write_changelogs, daemon=True
+                )
+                self.changelog_writer.start()
+
+    def get_changelog_batch(self, entries=None):
+        entries, batch_size = (
+            entries or [],
+            self.transactions["changelog"]["batch_size"],
+        )
+        while len(entries) < batch_size:
+            try:
+                entries.append(self.changelog_queue.get_nowait())
+            except Empty:
+                break
+        return entries
+
+    def write_changelogs(self):
+        while True:
+            self.write_changelog_batches([self.changelog_queue.get()])
+
+    def write_changelog_batches(self, entries=None, attempts=None):
+        while True:
+            entries = self.get_changelog_batch(entries)
+            if not entries:
+                return
+            with self.changelog_lock:
+                for index in range(attempts or self.retry_commit_number):
+                    try:
+                        self.changelog_session.bulk_insert_mappings(
+                            models["changelog"], entries
+                        )
+                        self.changelog_session.commit()
+                        self.changelog_metrics["written"] += len(entries)
+                        break
+                    except Exception as exc:
+                        self.changelog_session.rollback()
+                        error(f"Changelog commit n°{index} failed ({exc})")
+                        sleep(self.retry_commit_time * (index + 1) * (not attempts))
+                else:
+                    self.changelog_metrics["failed"] += len(entries)
+            for _ in entries:
+                self.changelog_queue.task_done()
+            entries = None
+
+    def flush_changelog(self):
+        if self.dialect == "sqlite":
+            self.session.commit()
+        else:
+            self.write_changelog_batches()
+            self.changelog_queue.join()
+
     def cleanup(self):
+        self.write_changelog_batches(attempts=1)
         self.engine.dispose()
 
 
@@ -114,6 +114,14 @@ class ServiceForm(BaseForm):
     )
     multiprocessing = BooleanField("Multiprocessing")
     max_processes = IntegerField("Maximum number of processes", default=15)
+    executor = SelectField(
+        "Multiprocessing Executor",
+        choices=(
+            ("thread", "Thread Pool"),
+            ("process", "Process Pool"),
+            ("asyncio", "Asyncio Event Loop"),
+        ),
+    )
     validation_condition = SelectField(
         choices=(
             ("none", "No validation"),
@@ -191,7 +199,8 @@ class ServiceForm(BaseForm):
                 f" and the matching value is empty: these do no match."
             )
         too_many_threads_error = (
-            self.max_processes.data > app.settings["automation"]["max_process"]
+            self.executor.data != "asyncio"
+            and self.max_processes.data > app.settings["automation"]["max_process"]
         )
         if too_many_threads_error:
             self.max_processes.errors.append(
@@ -224,6 +233,7 @@ class ConnectionForm(ServiceForm):
     custom_password = PasswordField("Custom Password", substitution=True)
     start_new_connection = BooleanField("Start New Connection")
     close_connection = BooleanField("Close Connection")
+    persistent_connection = BooleanField("Use Persistent Connection Pool")
     groups = {
         "Connection Parameters": {
             "commands": [
@@ -232,6 +242,7 @@ class ConnectionForm(ServiceForm):
                 "custom_password",
                 "start_new_connection",
                 "close_connection",
+                "persistent_connection",
             ],
             "default": "expanded",
         }
@@ -1,4 +1,6 @@
+from asyncio import gather, Semaphore
 from builtins import __dict__ as builtins
+from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime
 from functools import partial
@@ -6,6 +8,7 @@ from importlib import __import__ as importlib_import
 from io import BytesIO, StringIO
 from json import dump, load, loads
 from json.decoder import JSONDecodeError
+from multiprocessing import get_context
 from multiprocessing.pool import ThreadPool
 from napalm import get_network_driver
 from netmiko import ConnectHandler
@@ -17,7 +20,7 @@ from scp import SCPClient
 from sqlalchemy import Boolean, ForeignKey, Index, Integer, or_
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import aliased, relationship
-from threading import Thread
+from threading import Condition, Lock, Thread
 from time import sleep
 from traceback import format_exc
 from warnings import warn
@@ -25,7 +28,7 @@ from xmltodict import parse
 from xml.parsers.expat import ExpatError
 
 try:
-    from scrapli import Scrapli
+    from scrapli import AsyncScrapli, Scrapli
 except ImportError as exc:
     warn(f"Couldn't import scrapli module ({exc})")
 
@@ -122,6 +125,7 @@ class Service(AbstractBase):
     maximum_runs = db.Column(Integer, default=1)
     multiprocessing = db.Column(Boolean, default=False)
     max_processes = db.Column(Integer, default=5)
+    executor = db.Column(db.TinyString, default="thread")
     status = db.Column(db.TinyString, default="Idle")
     validation_condition = db.Column(db.TinyString, default="none")
     conversion_method = db.Column(db.TinyString, default="none")
@@ -222,6 +226,7 @@ class ConnectionService(Service):
     custom_password = db.Column(db.SmallString)
     start_new_connection = db.Column(Boolean, default=False)
     close_connection = db.Column(Boolean, default=False)
+    persistent_connection = db.Column(Boolean, default=False)
     __mapper_args__ = {"polymorphic_identity": "connection_service"}
 
 
@@ -353,6 +358,7 @@ class Run(AbstractBase):
     state = db.Column(db.Dict, info={"log_change": False})
     results = relationship("Result", back_populates="run", cascade="all, delete-orphan")
     model_properties = ["progress", "service_properties"]
+    substitution_regex = compile("{{(.*?)}}")
 
     def __init__(self, **kwargs):
         self.runtime = kwargs.get("runtime") or app.get_time()
@@ -433,18 +439,7 @@ class Run(AbstractBase):
         if self.original.state:
             return self.original.state
         elif app.redis_queue:
-            keys = app.redis("keys", f"{self.parent_runtime}/state/*")
-            if not keys:
-                return {}
-            data, state = list(zip(keys, app.redis("mget", *keys))), {}
-            for log, value in data:
-                inner_store, (*path, last_key) = state, log.split("/")[2:]
-                for key in path:
-                    inner_store = inner_store.setdefault(key, {})
-                if value in ("False", "True"):
-                    value = value == "True"
-                inner_store[last_key] = value
-            return state
+            return app.get_run_state(self.parent_runtime)
         else:
             return app.run_db[self.parent_runtime]
 
@@ -471,15 +466,26 @@ class Run(AbstractBase):
         devices, not_found = set(), []
         if isinstance(values, str):
             values = [values]
+        if app.settings["automation"]["device_query_memo"]:
+            if "device_query_memo" not in _self.__dict__:
+                _self.device_query_memo = defaultdict(dict)
+            memo = _self.device_query_memo[property]
+        else:
+            memo = {}
+        values_to_fetch = {
+            value
+            for value in values
+            if not isinstance(value, models["device"]) and value not in memo
+        }
+        for device in db.fetch_in("device", property, values_to_fetch):
+            memo.setdefault(getattr(device, property), device)
         for value in values:
             if isinstance(value, models["device"]):
-                device = value
+                devices.add(value)
+            elif value in memo:
+                devices.add(memo[value])
             else:
-                device = db.fetch("device", allow_none=True, **{property: value})
-            if device:
-                devices.add(device)
-            else:
-                not_found.append(value)
+                not_found.append(str(value))
         if not_found:
             raise Exception(f"Device query invalid targets: {', '.join(not_found)}")
         return devices
@@ -518,10 +524,8 @@ class Run(AbstractBase):
         if app.redis_queue:
             if isinstance(value, bool):
                 value = str(value)
-            app.redis(
-                {None: "set", "append": "lpush", "increment": "incr"}[method],
-                f"{self.parent_runtime}/state/{self.path}/{path}",
-                value,
+            app.buffer_run_state(
+                self.parent_runtime, f"{self.path}/{path}", value, method
             )
         else:
             *keys, last = f"{self.parent_runtime}/{self.path}/{path}".split("/")
@@ -540,6 +544,8 @@ class Run(AbstractBase):
         self.init_state()
         self.write_state("status", "Running")
         start = datetime.now().replace(microsecond=0)
+        if self.update_pools_after_running:
+            changes = db.track_changes()
         try:
             app.service_db[self.service.id]["runs"] += 1
             results = {"runtime": self.runtime, **self.device_run(payload)}
@@ -548,13 +554,13 @@ class Run(AbstractBase):
             self.log("error", result)
             results = {"success": False, "runtime": self.runtime, "result": result}
         finally:
+            self.flush_results()
             db.session.commit()
             state = self.get_state()
             self.status = state["status"] = "Aborted" if self.stop else "Completed"
             self.success = results["success"]
             if self.update_pools_after_running:
-                for pool in db.fetch_all("pool"):
-                    pool.compute_pool()
+                app.update_pools_from_changes(db.untrack_changes(changes))
             if self.send_notification:
                 try:
                     results = self.notify(results, payload)
@@ -570,6 +576,7 @@ class Run(AbstractBase):
             if self.runtime == self.parent_runtime:
                 self.state = state
                 self.close_remaining_connections()
+                app.run_code_cache.pop(self.runtime, None)
             if self.task and not (self.task.frequency or self.task.crontab_expression):
                 self.task.is_active = False
             results["properties"] = {
@@ -589,8 +596,10 @@ class Run(AbstractBase):
                 results = self.create_result(
                     results, run_result=self.runtime == self.parent_runtime
                 )
-            if app.redis_queue and self.runtime == self.parent_runtime:
-                app.redis("delete", *(app.redis("keys", f"{self.runtime}/*") or []))
+            if self.runtime == self.parent_runtime:
+                app.delete_run_logs(self.runtime)
+                if app.redis_queue:
+                    app.delete_run_state(self.runtime)
         return results
 
     def make_results_json_compliant(self, results):
@@ -614,6 +623,84 @@ class Run(AbstractBase):
         run = db.fetch("run", runtime=runtime)
         results.append(run.get_results(payload, device))
 
+    @staticmethod
+    def init_process():
+        db.session.remove()
+        db.engine.dispose()
+        db.init_changelog_writer()
+        app.run_db.clear()
+        app.run_logs.clear()
+        app.run_logs_condition = Condition()
+        app.event_loop = None
+        app.settings["automation"]["connection_pool"]["active"] = False
+        app.run_state_buffer.clear()
+        app.run_state_lock, app.run_state_flusher = Lock(), None
+
+    @staticmethod
+    def get_device_process_result(args):
+        device_id, runtime, payload = args
+        device = db.fetch("device", id=device_id)
+        run = db.fetch("run", runtime=runtime)
+        results = run.make_results_json_compliant(run.get_results(payload, device))
+        run.close_device_connection(device.name)
+        run.flush_results()
+        parent_runtime = run.parent_runtime
+        db.flush_changelog()
+        db.session.commit()
+        db.session.remove()
+        if app.redis_queue:
+            app.flush_run_state()
+        app.run_db.pop(parent_runtime, None)
+        return results, dict(app.run_logs.pop(parent_runtime, {}))
+
+    def process_run(self, payload, devices, processes):
+        process_args = [(device.id, self.runtime, payload) for device in devices]
+        self.log("info", f"Starting a pool of {processes} processes")
+        db.session.commit()
+        context = get_context("fork")
+        with context.Pool(processes, initializer=self.init_process) as pool:
+            process_results = pool.map(self.get_device_process_result, process_args)
+        results = []
+        for result, logs in process_results:
+            results.append(result)
+            for service_id, service_logs in logs.items():
+                if app.redis_queue:
+                    app.run_logs[self.parent_runtime][service_id] = None
+                    continue
+                for log in service_logs["lines"]:
+                    app.log_queue(self.parent_runtime, service_id, log)
+            if app.redis_queue:
+                continue
+            status = "success" if result["success"] else "failure"
+            self.write_state(f"progress/device/{status}", 1, "increment")
+            if not result["success"]:
+                self.write_state("success", False)
+            self.write_state("results/written", 1, "increment")
+        db.record_changes({"device": app.properties["filtering"]["device"]})
+        db.session.expire(self, ["results"])
+        return results
+
+    async def async_device_run(self, payload, devices):
+        run_semaphore = Semaphore(self.max_processes)
+        service_semaphore = app.service_semaphore(self.service_id)
+
+        async def get_async_device_result(device):
+            async with run_semaphore, service_semaphore:
+                if self.service.preprocessing:
+                    try:
+                        self.eval(
+                            self.service.preprocessing, function="exec", **locals()
+                        )
+                    except SystemExit:
+                        pass
+                try:
+                    result = await self.service.async_job(self, payload, device)
+                except Exception as exc:
+                    result = exc
+            app.run_async_results[self.runtime][device.name] = result
+
+        await gather(*(get_async_device_result(device) for device in devices))
+
     def device_iteration(self, payload, device):
         derived_devices = self.compute_devices_from_query(
             self.service.iteration_devices,
@@ -714,13 +801,34 @@ class Run(AbstractBase):
                 return {"success": False, "runtime": self.runtime, "result": error}
             if self.multiprocessing and len(non_skipped_targets) > 1:
                 processes = min(len(non_skipped_targets), self.max_processes)
-                process_args = [
-                    (device.id, self.runtime, payload, results)
-                    for device in non_skipped_targets
-                ]
-                self.log("info", f"Starting a pool of {processes} threads")
-                with ThreadPool(processes=processes) as pool:
-                    pool.map(self.get_device_result, process_args)
+                if self.executor == "process":
+                    process_results = self.process_run(
+                        payload, non_skipped_targets, processes
+                    )
+                    results.extend(process_results)
+                elif self.executor == "asyncio" and hasattr(self.service, "async_job"):
+                    self.log(
+                        "info",
+                        f"Running {len(non_skipped_targets)} devices on the event loop",
+                    )
+                    try:
+                        app.run_coroutine(
+                            self.async_device_run(payload, non_skipped_targets)
+                        )
+                        results.extend(
+                            self.get_results(payload, device, commit=False)
+                            for device in non_skipped_targets
+                        )
+                    finally:
+                        app.run_async_results.pop(self.runtime, None)
+                else:
+                    process_args = [
+                        (device.id, self.runtime, payload, results)
+                        for device in non_skipped_targets
+                    ]
+                    self.log("info", f"Starting a pool of {processes} threads")
+                    with ThreadPool(processes=processes) as pool:
+                        pool.map(self.get_device_result, process_args)
             else:
                 results.extend(
                     [
@@ -754,12 +862,12 @@ class Run(AbstractBase):
         if self.parent_runtime == self.runtime and not device:
             services = list(app.run_logs.get(self.runtime, []))
             for service_id in services:
-                logs = app.log_queue(self.runtime, service_id, mode="get")
+                logs, _ = app.get_run_logs(self.runtime, service_id)
                 db.factory(
                     "service_log",
                     runtime=self.runtime,
                     service=service_id,
-                    content="\n".join(logs or []),
+                    content="\n".join(logs),
                 )
             if self.trigger == "REST":
                 results["devices"] = {}
@@ -767,9 +875,46 @@ class Run(AbstractBase):
                     results["devices"][result.device.name] = result.result
         create_failed_results = self.disable_result_creation and not self.success
         if not self.disable_result_creation or create_failed_results or run_result:
-            db.factory("result", result=results, commit=commit, **result_kw)
+            if device and not run_result:
+                self.buffer_result(results, device)
+            else:
+                db.factory("result", result=results, commit=commit, **result_kw)
         return results
 
+    def buffer_result(self, results, device):
+        result = {
+            "success": results["success"],
+            "runtime": results["runtime"],
+            "duration": results["duration"],
+            "result": results,
+            "run_id": self.id,
+            "service_id": self.service_id,
+            "parent_runtime": self.parent_runtime,
+            "workflow_id": self.workflow_id,
+            "parent_device_id": self.parent_device_id,
+            "device_id": device.id,
+        }
+        with app.run_results_lock:
+            buffer = app.run_results[self.runtime]
+            buffer.append(result)
+            full_buffer = len(buffer) >= app.settings["automation"]["result_batch_size"]
+        if full_buffer:
+            self.flush_results()
+
+    def flush_results(self):
+        with app.run_results_lock:
+            results = app.run_results.pop(self.runtime, [])
+        if not results:
+            return
+        start = datetime.now()
+        db.session.bulk_insert_mappings(models["result"], results)
+        db.session.commit()
+        db.session.expire(self, ["results"])
+        duration = (datetime.now() - start).total_seconds()
+        self.write_state("results/written", len(results), "increment")
+        self.write_state("results/rate", int(len(results) / (duration or 0.001)))
+        self.log("info", f"Saved {len(results)} results in {duration}s")
+
     def run_service_job(self, payload, device):
         args = (device,) if device else ()
         retries, total_retries = self.number_of_retries + 1, 0
@@ -779,11 +924,14 @@ class Run(AbstractBase):
                 return {"success": False, "result": "Stopped"}
             retries -= 1
             total_retries += 1
+            async_result = app.run_async_results.get(self.runtime, {}).pop(
+                getattr(device, "name", None), None
+            )
             try:
                 if self.number_of_retries - retries:
                     retry = self.number_of_retries - retries
                     self.log("error", f"RETRY n°{retry}", device)
-                if self.service.preprocessing:
+                if self.service.preprocessing and async_result is None:
                     try:
                         self.eval(
                             self.service.preprocessing, function="exec", **locals()
@@ -791,7 +939,7 @@ class Run(AbstractBase):
                     except SystemExit:
                         pass
                 try:
-                    results = self.service.job(self, payload, *args)
+                    results = self.service_job(payload, async_result, *args)
                 except Exception as exc:
                     self.log("error", str(exc), device)
                     result = "\n".join(format_exc().splitlines())
@@ -835,6 +983,16 @@ class Run(AbstractBase):
                 results = {"success": False, "result": result}
         return results
 
+    def service_job(self, payload, async_result, *args):
+        if isinstance(async_result, Exception):
+            raise async_result
+        elif async_result is not None:
+            return async_result
+        elif self.executor == "asyncio" and args and hasattr(self.service, "async_job"):
+            return app.run_coroutine(self.service.async_job(self, payload, *args))
+        else:
+            return self.service.job(self, payload, *args)
+
     def get_results(self, payload, device=None, commit=True):
         self.log("info", "STARTING", device)
         start = datetime.now().replace(microsecond=0)
@@ -1154,48 +1312,70 @@ class Run(AbstractBase):
             raise db.rbac_error(f"Cannot fetch {model}s from workflow builder.")
         return getattr(db, func)(model, rbac="edit", username=self.creator, **kwargs)
 
+    @property
+    def global_namespace(self):
+        if "_global_namespace" not in self.__dict__:
+            self._global_namespace = {
+                "__builtins__": {**builtins, "__import__": self._import},
+                "fetch": self.fetch,
+                "fetch_all": partial(self.fetch, func="fetch_all"),
+                "send_email": app.send_email,
+                "settings": app.settings,
+                "encrypt": app.encrypt_password,
+                "get_result": self.get_result,
+                "log": self.log,
+                "workflow": self.workflow,
+                "placeholder": self.original.placeholder,
+                "dict_to_string": app.str_dict,
+            }
+        return self._global_namespace
+
     def global_variables(_self, **locals):  # noqa: N805
         payload, device = locals.get("payload", {}), locals.get("device")
         variables = locals
         variables.update(payload.get("variables", {}))
         if device and "devices" in payload.get("variables", {}):
             variables.update(payload["variables"]["devices"].get(device.name, {}))
+        variables.update(_self.global_namespace)
         variables.update(
             {
-                "__builtins__": {**builtins, "__import__": _self._import},
-                "fetch": _self.fetch,
-                "fetch_all": partial(_self.fetch, func="fetch_all"),
-                "send_email": app.send_email,
-                "settings": app.settings,
                 "devices": _self.target_devices,
-                "encrypt": app.encrypt_password,
                 "get_var": partial(_self.get_var, payload),
-                "get_result": _self.get_result,
-                "log": _self.log,
-                "workflow": _self.workflow,
                 "set_var": partial(_self.payload_helper, payload),
                 "parent_device": _self.parent_device or device,
-                "placeholder": _self.original.placeholder,
-                "dict_to_string": app.str_dict,
             }
         )
         return variables
 
+    def compile_code(self, query, function):
+        cache = app.run_code_cache[self.parent_runtime]
+        with app.run_code_cache_lock:
+            code = cache.get((query, function))
+            if code:
+                cache.move_to_end((query, function))
+                return code
+        source = query.lstrip(" \t") if function == "eval" else query
+        code = builtins["compile"](source, "<string>", function)
+        with app.run_code_cache_lock:
+            cache[(query, function)] = code
+            while len(cache) > app.settings["automation"]["code_cache_size"]:
+                cache.popitem(last=False)
+        return code
+
     def eval(_self, query, function="eval", **locals):  # noqa: N805
         exec_variables = _self.global_variables(**locals)
-        results = builtins[function](query, exec_variables) if query else ""
-        return results, exec_variables
+        if not query:
+            return "", exec_variables
+        code = _self.compile_code(query, function)
+        return builtins[function](code, exec_variables), exec_variables
 
     def sub(self, input, variables):
-
-        r = compile("{{(.*?)}}")
-
         def replace(match):
             return str(self.eval(match.group()[2:-2], **variables)[0])
 
         def rec(input):
             if isinstance(input, str):
-                return r.sub(replace, input)
+                return self.substitution_regex.sub(replace, input)
             elif isinstance(input, list):
                 return [rec(x) for x in input]
             elif isinstance(input, dict):
@@ -1242,6 +1422,11 @@ class Run(AbstractBase):
         if connection:
             self.log("info", "Using cached Netmiko connection", device)
             return self.update_netmiko_connection(connection)
+        driver = device.netmiko_driver if self.use_device_driver else self.driver
+        connection = self.get_pooled_connection("netmiko", device, driver)
+        if connection:
+            self.log("info", "Using pooled Netmiko connection", device)
+            return self.update_netmiko_connection(connection)
         self.log(
             "info",
             "OPENING Netmiko connection",
@@ -1249,7 +1434,6 @@ class Run(AbstractBase):
             change_log=False,
             logger="security",
         )
-        driver = device.netmiko_driver if self.use_device_driver else self.driver
         netmiko_connection = ConnectHandler(
             device_type=driver,
             ip=device.ip_address,
@@ -1265,9 +1449,7 @@ class Run(AbstractBase):
             netmiko_connection.enable()
         if self.config_mode:
             netmiko_connection.config_mode()
-        app.connections_cache["netmiko"][self.parent_runtime][
-            device.name
-        ] = netmiko_connection
+        self.register_connection("netmiko", device, driver, netmiko_connection)
         return netmiko_connection
 
     def scrapli_connection(self, device):
@@ -1275,6 +1457,11 @@ class Run(AbstractBase):
         if connection:
             self.log("info", "Using cached Scrapli connection", device)
             return connection
+        platform = device.scrapli_driver if self.use_device_driver else self.driver
+        connection = self.get_pooled_connection("scrapli", device, platform)
+        if connection:
+            self.log("info", "Using pooled Scrapli connection", device)
+            return connection
         self.log(
             "info",
             "OPENING Scrapli connection",
@@ -1285,7 +1472,7 @@ class Run(AbstractBase):
         credentials = self.get_credentials(device)
         connection = Scrapli(
             transport=self.transport,
-            platform=device.scrapli_driver if self.use_device_driver else self.driver,
+            platform=platform,
             host=device.ip_address,
             auth_username=credentials["username"],
             auth_password=credentials["password"],
@@ -1293,14 +1480,38 @@ class Run(AbstractBase):
             auth_strict_key=False,
         )
         connection.open()
-        app.connections_cache["scrapli"][self.parent_runtime][device.name] = connection
+        self.register_connection("scrapli", device, platform, connection)
         return connection
 
+    def async_scrapli_connection(self, device):
+        self.log(
+            "info",
+            "OPENING Async Scrapli connection",
+            device,
+            change_log=False,
+            logger="security",
+        )
+        credentials = self.get_credentials(device)
+        return AsyncScrapli(
+            transport=self.async_transport,
+            platform=device.scrapli_driver if self.use_device_driver else self.driver,
+            host=device.ip_address,
+            auth_username=credentials["username"],
+            auth_password=credentials["password"],
+            auth_private_key=False,
+            auth_strict_key=False,
+        )
+
     def napalm_connection(self, device):
         connection = self.get_or_close_connection("napalm", device.name)
         if connection:
             self.log("info", "Using cached NAPALM connection", device)
             return connection
+        driver = device.napalm_driver if self.use_device_driver else self.driver
+        connection = self.get_pooled_connection("napalm", device, driver)
+        if connection:
+            self.log("info", "Using pooled NAPALM connection", device)
+            return connection
         self.log(
             "info",
             "OPENING Napalm connection",
@@ -1314,19 +1525,14 @@ class Run(AbstractBase):
             optional_args = {}
         if "secret" not in optional_args:
             optional_args["secret"] = credentials.pop("secret")
-        driver = get_network_driver(
-            device.napalm_driver if self.use_device_driver else self.driver
-        )
-        napalm_connection = driver(
+        napalm_connection = get_network_driver(driver)(
             hostname=device.ip_address,
             timeout=self.timeout,
             optional_args=optional_args,
             **credentials,
         )
         napalm_connection.open()
-        app.connections_cache["napalm"][self.parent_runtime][
-            device.name
-        ] = napalm_connection
+        self.register_connection("napalm", device, driver, napalm_connection)
         return napalm_connection
 
     def get_or_close_connection(self, library, device):
@@ -1335,20 +1541,61 @@ class Run(AbstractBase):
             return
         if self.start_new_connection:
             return self.disconnect(library, device, connection)
-        if library == "napalm":
-            if connection.is_alive():
-                return connection
+        if self.is_connection_alive(library, connection):
+            return connection
+        self.disconnect(library, device, connection)
+
+    @staticmethod
+    def is_connection_alive(library, connection):
+        try:
+            if library == "napalm":
+                return bool(connection.is_alive())
+            elif library == "netmiko":
+                connection.find_prompt()
             else:
-                self.disconnect(library, device, connection)
-        else:
-            try:
-                if library == "netmiko":
-                    connection.find_prompt()
-                else:
-                    connection.get_prompt()
-                return connection
-            except Exception:
-                self.disconnect(library, device, connection)
+                connection.get_prompt()
+            return True
+        except Exception:
+            return False
+
+    def get_pool_key(self, library, device, driver):
+        pool_settings = app.settings["automation"]["connection_pool"]
+        if not pool_settings["active"] or not getattr(
+            self, "persistent_connection", False
+        ):
+            return
+        username = self.get_credentials(device)["username"]
+        return (device.name, library, username, driver)
+
+    def get_pooled_connection(self, library, device, driver):
+        key = self.get_pool_key(library, device, driver)
+        if not key or self.start_new_connection:
+            return
+        connection = app.checkout_connection(key)
+        if not connection:
+            return
+        if not self.is_connection_alive(library, connection):
+            return app.close_pooled_connection(key, connection)
+        self.register_connection(library, device, driver, connection, key)
+        return connection
+
+    def register_connection(self, library, device, driver, connection, key=None):
+        app.connections_cache[library][self.parent_runtime][device.name] = connection
+        key = key or self.get_pool_key(library, device, driver)
+        if key:
+            app.pooled_connection_keys[
+                (library, self.parent_runtime, device.name)
+            ] = key
+
+    def release_connection(self, library, device, connection):
+        key = app.pooled_connection_keys.pop(
+            (library, self.parent_runtime, device), None
+        )
+        if not key or getattr(self, "close_connection", False):
+            return self.disconnect(library, device, connection)
+        app.connections_cache[library][self.parent_runtime].pop(device, None)
+        app.release_connection(key, connection)
+        self.log("info", f"Released {library} connection to the pool", device)
 
     def get_connection(self, library, device):
         cache = app.connections_cache[library].get(self.parent_runtime, {})
@@ -1358,7 +1605,7 @@ class Run(AbstractBase):
         for library in ("netmiko", "napalm", "scrapli"):
             connection = self.get_connection(library, device)
             if connection:
-                self.disconnect(library, device, connection)
+                self.release_connection(library, device, connection)
 
     def close_remaining_connections(self):
         threads = []
@@ -1367,7 +1614,7 @@ class Run(AbstractBase):
             for device in devices:
                 connection = app.connections_cache[library][self.runtime][device]
                 thread = Thread(
-                    target=self.disconnect, args=(library, device, connection)
+                    target=self.release_connection, args=(library, device, connection)
                 )
                 thread.start()
                 threads.append(thread)
@@ -1376,6 +1623,7 @@ class Run(AbstractBase):
 
     def disconnect(self, library, device, connection):
         try:
+            app.pooled_connection_keys.pop((library, self.parent_runtime, device), None)
             connection.disconnect() if library == "netmiko" else connection.close()
             app.connections_cache[library][self.parent_runtime].pop(device)
             self.log("info", f"Closed {library} connection", device)
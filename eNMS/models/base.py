@@ -84,10 +84,10 @@ class AbstractBase(db.base):
             if pool.manually_defined or not pool.compute(self.class_type):
                 continue
             match = pool.object_match(self)
-            if match and self not in getattr(pool, f"{self.class_type}s"):
-                getattr(pool, f"{self.class_type}s").append(self)
-            if self in getattr(pool, f"{self.class_type}s") and not match:
-                getattr(pool, f"{self.class_type}s").remove(self)
+            if match and pool not in self.pools:
+                self.pools.append(pool)
+            if pool in self.pools and not match:
+                self.pools.remove(pool)
 
     def delete(self):
         pass
@@ -1,7 +1,20 @@
 from flask_login import current_user
 from operator import attrgetter
-from re import search, sub
-from sqlalchemy import and_, Boolean, event, ForeignKey, Integer, or_
+from re import compile, escape, search, sub
+from sqlalchemy import (
+    and_,
+    Boolean,
+    cast,
+    event,
+    ForeignKey,
+    func,
+    inspect,
+    Integer,
+    LargeBinary,
+    not_,
+    or_,
+    String,
+)
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import aliased, backref, relationship
 from sqlalchemy.schema import UniqueConstraint
@@ -289,6 +302,7 @@ class Pool(AbstractBase):
     access_groups = db.Column(db.LargeString)
     admin_only = db.Column(Boolean, default=False)
     last_modified = db.Column(db.TinyString, info={"log_change": False})
+    last_computed = db.Column(db.TinyString, info={"log_change": False})
     description = db.Column(db.LargeString)
     operator = db.Column(db.TinyString, default="all")
     target_services = relationship(
@@ -332,8 +346,13 @@ class Pool(AbstractBase):
 
     @classmethod
     def database_init(cls):
+        cls.filtering_properties = ["manually_defined", "operator"]
         for model in cls.models:
             for property in properties["filtering"][model]:
+                cls.filtering_properties.extend(
+                    f"{model}_{property}{suffix}"
+                    for suffix in ("", "_match", "_invert")
+                )
                 setattr(cls, f"{model}_{property}", db.Column(db.LargeString))
                 setattr(
                     cls,
@@ -362,25 +381,93 @@ class Pool(AbstractBase):
             for user in set(self.users) | old_users:
                 user.update_rbac()
 
-    def property_match(self, obj, property):
-        pool_value = getattr(self, f"{obj.class_type}_{property}")
-        object_value = str(getattr(obj, property))
-        match = getattr(self, f"{obj.class_type}_{property}_match")
-        invert = getattr(self, f"{obj.class_type}_{property}_invert")
-        if match == "inclusion":
-            result = pool_value in object_value
-        elif match == "equality":
-            result = pool_value == object_value
-        else:
-            result = bool(search(pool_value, object_value))
-        return not result if invert else result
-
-    def object_match(self, obj):
+    def get_matchers(self, model):
+        matchers = []
+        for property in properties["filtering"][model]:
+            pool_value = getattr(self, f"{model}_{property}")
+            if not pool_value:
+                continue
+            match = getattr(self, f"{model}_{property}_match")
+            if match == "inclusion":
+                function = compile(escape(pool_value)).search
+            elif match == "equality":
+                function = pool_value.__eq__
+            else:
+                function = compile(pool_value).search
+            invert = getattr(self, f"{model}_{property}_invert")
+            matchers.append((property, function, invert))
+        return matchers
+
+    def object_match(self, obj, matchers=None):
+        if matchers is None:
+            matchers = self.get_matchers(obj.class_type)
         operator = all if self.operator == "all" else any
         return operator(
-            self.property_match(obj, property)
-            for property in properties["filtering"][obj.class_type]
-            if getattr(self, f"{obj.class_type}_{property}")
+            bool(function(str(getattr(obj, property)))) != bool(invert)
+            for property, function, invert in matchers
+        )
+
+    def get_sql_constraint(self, model):
+        constraints, columns = [], inspect(models[model]).columns
+        for property in properties["filtering"][model]:
+            pool_value = getattr(self, f"{model}_{property}")
+            if not pool_value:
+                continue
+            if not isinstance(getattr(columns.get(property), "type", None), String):
+                return
+            value = func.coalesce(getattr(models[model], property), "None")
+            if db.dialect == "mysql":
+                value = cast(value, LargeBinary)
+            match = getattr(self, f"{model}_{property}_match")
+            if match == "inclusion":
+                position = "strpos" if db.dialect == "postgresql" else "instr"
+                constraint = getattr(func, position)(value, pool_value) > 0
+            elif match == "equality":
+                constraint = value == pool_value
+            else:
+                regex_operator = "~" if db.dialect == "postgresql" else "regexp"
+                constraint = value.op(regex_operator)(pool_value)
+            if getattr(self, f"{model}_{property}_invert"):
+                constraint = not_(constraint)
+            constraints.append(constraint)
+        return (and_ if self.operator == "all" else or_)(*constraints)
+
+    def get_matching_ids(self, query, model):
+        constraint = self.get_sql_constraint(model)
+        if constraint is not None:
+            query = query.with_entities(models[model].id).filter(constraint)
+            return {instance_id for instance_id, in query}
+        matchers = self.get_matchers(model)
+        return {
+            instance.id
+            for instance in query
+            if self.object_match(instance, matchers=matchers)
+        }
+
+    def update_members(self, model, matching_ids, candidates=None):
+        table = getattr(db, f"pool_{model}_table")
+        column = getattr(table.c, f"{model}_id")
+        delete = table.delete().where(table.c.pool_id == self.id)
+        if candidates is None:
+            db.session.execute(delete)
+        else:
+            candidate_ids = [instance_id for instance_id, in candidates]
+            for index in range(0, len(candidate_ids), db.transactions["chunk_size"]):
+                chunk = candidate_ids[index : index + db.transactions["chunk_size"]]
+                db.session.execute(delete.where(column.in_(chunk)))
+        if matching_ids:
+            db.session.execute(
+                table.insert(),
+                [
+                    {"pool_id": self.id, f"{model}_id": instance_id}
+                    for instance_id in matching_ids
+                ],
+            )
+        db.session.expire(self, [f"{model}s"])
+        return (
+            db.session.query(func.count(column))
+            .filter(table.c.pool_id == self.id)
+            .scalar()
         )
 
     def compute(self, model):
@@ -389,18 +476,38 @@ class Pool(AbstractBase):
             for property in properties["filtering"][model]
         )
 
-    def compute_pool(self):
+    def depends_on(self, changes):
+        return not self.manually_defined and any(
+            getattr(self, f"{model}_{property}")
+            for model in self.models
+            for property in changes.get(model, ())
+        )
+
+    def compute_pool(self, incremental=False):
+        if self.manually_defined:
+            for model in self.models:
+                number = len(getattr(self, f"{model}s"))
+                setattr(self, f"{model}_number", number)
+            return
+        if inspect(self).transient:
+            db.session.add(self)
+        db.session.flush()
+        computed_time = app.get_time()
         for model in self.models:
-            if not self.manually_defined:
-                instances = (
-                    list(filter(self.object_match, db.fetch_all(model)))
-                    if self.compute(model)
-                    else []
-                )
-                setattr(self, f"{model}s", instances)
+            query, candidates = db.query(model), None
+            if not self.compute(model):
+                matching_ids = set()
+            elif incremental and self.last_computed:
+                last_modified = getattr(models[model], "last_modified", None)
+                if last_modified is not None:
+                    query = query.filter(last_modified >= self.last_computed)
+                    candidates = query.with_entities(models[model].id)
+                matching_ids = self.get_matching_ids(query, model)
             else:
-                instances = getattr(self, f"{model}s")
-            setattr(self, f"{model}_number", len(instances))
+                matching_ids = self.get_matching_ids(query, model)
+            number = self.update_members(model, matching_ids, candidates)
+            setattr(self, f"{model}_number", number)
+        self.last_computed = computed_time
 
     @classmethod
     def rbac_filter(cls, query, mode, user):
@@ -10,9 +10,11 @@ from flask import (
     redirect,
     render_template,
     request,
+    Response,
     send_file,
-    url_for,
     session,
+    stream_with_context,
+    url_for,
 )
 from flask_httpauth import HTTPBasicAuth
 from flask_login import current_user, LoginManager, login_user, logout_user
@@ -301,6 +303,13 @@ class Server(Flask):
         def export_service(id):
             return send_file(f"/{app.export_service(id)}.tgz", as_attachment=True)
 
+        @blueprint.route("/stream_service_logs/<int:service>/<runtime>/<cursor>")
+        @self.monitor_requests
+        def stream_service_logs(service, runtime, cursor):
+            cursor = request.headers.get("Last-Event-ID", cursor)
+            stream = app.stream_service_logs(service, runtime, cursor)
+            return Response(stream_with_context(stream), mimetype="text/event-stream")
+
         @blueprint.route("/<path:_>")
         @self.monitor_requests
         def get_requests_sink(_):
@@ -19,6 +19,7 @@ class ScrapliService(ConnectionService):
     is_configuration = db.Column(Boolean, default=False)
     driver = db.Column(db.SmallString)
     transport = db.Column(db.SmallString, default="system")
+    async_transport = db.Column(db.SmallString, default="asyncssh")
     use_device_driver = db.Column(Boolean, default=True)
 
     __mapper_args__ = {"polymorphic_identity": "scrapli_service"}
@@ -29,6 +30,13 @@ class ScrapliService(ConnectionService):
         result = getattr(run.scrapli_connection(device), function)(commands).result
         return {"commands": commands, "result": result}
 
+    async def async_job(self, run, payload, device):
+        commands = run.sub(run.commands, locals()).splitlines()
+        function = "send_configs" if run.is_configuration else "send_commands"
+        async with run.async_scrapli_connection(device) as connection:
+            response = await getattr(connection, function)(commands)
+        return {"commands": commands, "result": response.result}
+
 
 class ScrapliForm(ConnectionForm):
     form_type = HiddenField(default="scrapli_service")
@@ -36,6 +44,7 @@ class ScrapliForm(ConnectionForm):
     is_configuration = BooleanField()
     driver = SelectField(choices=choices(app.SCRAPLI_DRIVERS))
     transport = SelectField(choices=choices(("system", "paramiko", "ssh2")))
+    async_transport = SelectField(choices=choices(("asyncssh", "asynctelnet")))
     use_device_driver = BooleanField(default=True)
     groups = {
         "Main Parameters": {
@@ -44,6 +53,7 @@ class ScrapliForm(ConnectionForm):
                 "is_configuration",
                 "driver",
                 "transport",
+                "async_transport",
                 "use_device_driver",
             ],
             "default": "expanded",
@@ -1,13 +1,21 @@
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from sqlalchemy import Boolean, ForeignKey, Integer
 from sqlalchemy.orm import backref, relationship
 from sqlalchemy.schema import UniqueConstraint
 
 from eNMS import app
 from eNMS.database import db
+from eNMS.models import models
 from eNMS.models.base import AbstractBase
 from eNMS.forms.automation import ServiceForm
-from eNMS.forms.fields import BooleanField, HiddenField, InstanceField, SelectField
+from eNMS.forms.fields import (
+    BooleanField,
+    HiddenField,
+    InstanceField,
+    IntegerField,
+    SelectField,
+)
 from eNMS.models.automation import Service
 
 
@@ -18,6 +26,8 @@ class Workflow(Service):
     parent_type = "service"
     id = db.Column(Integer, ForeignKey("service.id"), primary_key=True)
     close_connection = db.Column(Boolean, default=False)
+    parallel_branches = db.Column(Boolean, default=False)
+    max_parallel_branches = db.Column(Integer, default=5)
     labels = db.Column(db.Dict, info={"log_change": False})
     services = relationship(
         "Service", secondary=db.service_workflow_table, back_populates="workflows"
@@ -104,56 +114,122 @@ class Workflow(Service):
     def deep_edges(self):
         return sum([w.edges for w in self.deep_services if w.type == "workflow"], [])
 
+    def build_index(self, run):
+        index = {
+            "services": {},
+            "prerequisites": defaultdict(set),
+            "successors": defaultdict(list),
+            "devices": {device.name: device.id for device in run.target_devices},
+        }
+        for service in self.services:
+            self.index_service(index, service)
+        for edge in self.edges:
+            if edge.subtype == "prerequisite":
+                index["prerequisites"][edge.destination_id].add(edge.source_id)
+            else:
+                index["successors"][(edge.source_id, edge.subtype)].append(
+                    (edge.destination_id, edge.id)
+                )
+        return index
+
+    def index_service(self, index, service):
+        index["services"][service.id] = {
+            "id": service.id,
+            "name": service.name,
+            "scoped_name": service.scoped_name,
+            "maximum_runs": service.maximum_runs,
+            "skip": service.skip.get(self.name, False),
+            "skip_value": service.skip_value,
+        }
+        if service.scoped_name in ("Start", "End"):
+            index[service.scoped_name.lower()] = index["services"][service.id]
+        return index["services"][service.id]
+
+    def get_index(self, run):
+        if "workflow_index" not in run.__dict__:
+            run.workflow_index = self.build_index(run)
+        return run.workflow_index
+
+    def get_device_ids(self, index, names):
+        missing_names = set(names) - set(index["devices"])
+        if missing_names:
+            device_query = db.query("device").filter(
+                models["device"].name.in_(missing_names)
+            )
+            index["devices"].update((device.name, device.id) for device in device_query)
+        for name in missing_names - set(index["devices"]):
+            index["devices"][name] = db.fetch("device", name=name).id
+        return [index["devices"][name] for name in names]
+
+    def run_branch(self, kwargs, payload):
+        try:
+            for property in ("parent", "restart_run"):
+                if kwargs[property]:
+                    kwargs[property] = db.fetch("run", id=kwargs[property])
+            return db.factory("run", commit=True, **kwargs).run(payload)
+        finally:
+            db.session.remove()
+
     def job(self, run, payload, device=None):
+        index = self.get_index(run)
         number_of_runs = defaultdict(int)
-        start = db.fetch("service", scoped_name="Start")
-        end = db.fetch("service", scoped_name="End")
-        services = [db.fetch("service", id=id) for id in run.start_services]
-        visited, targets, restart_run = set(), defaultdict(set), run.restart_run
+        services = [
+            index["services"].get(id)
+            or self.index_service(index, db.fetch("service", id=id))
+            for id in run.start_services
+        ]
+        visited, completed = set(), set()
+        targets, restart_run = defaultdict(set), run.restart_run
         tracking_bfs = run.run_method == "per_service_with_workflow_targets"
         start_targets = [device] if device else run.target_devices
         for service in services:
-            targets[service.name] |= {device.name for device in start_targets}
-        while services:
-            if run.stop:
-                return {"payload": payload, "success": False, "result": "Stopped"}
-            service = services.pop()
-            if number_of_runs[service.name] >= service.maximum_runs or any(
-                node not in visited
-                for node, _ in service.neighbors(self, "source", "prerequisite")
+            targets[service["name"]] |= {device.name for device in start_targets}
+        if device:
+            index["devices"][device.name] = device.id
+        start, end = index["start"], index["end"]
+
+        def is_ready(service):
+            done = completed if self.parallel_branches else visited
+            if number_of_runs[service["name"]] >= service["maximum_runs"] or any(
+                node not in done for node in index["prerequisites"][service["id"]]
             ):
-                continue
-            number_of_runs[service.name] += 1
-            visited.add(service)
-            if service in (start, end) or service.skip.get(self.name, False):
-                success = service.skip_value == "success"
-                results = {"result": "skipped", "success": success}
-                if tracking_bfs or device:
-                    results["summary"] = {
-                        "success": targets[service.name],
-                        "failure": [],
-                    }
-            else:
-                kwargs = {
-                    "service": run.placeholder.id
-                    if service.scoped_name == "Placeholder"
-                    else service.id,
-                    "workflow": self.id,
-                    "restart_run": restart_run,
-                    "parent": run,
-                    "parent_runtime": run.parent_runtime,
+                return False
+            number_of_runs[service["name"]] += 1
+            visited.add(service["id"])
+            return True
+
+        def get_skip_results(service):
+            if service["id"] not in (start["id"], end["id"]) and not service["skip"]:
+                return
+            success = service["skip_value"] == "success"
+            results = {"result": "skipped", "success": success}
+            if tracking_bfs or device:
+                results["summary"] = {
+                    "success": targets[service["name"]],
+                    "failure": [],
                 }
-                if tracking_bfs or device:
-                    kwargs["target_devices"] = [
-                        db.fetch("device", name=name).id
-                        for name in targets[service.name]
-                    ]
-                if run.parent_device_id:
-                    kwargs["parent_device"] = run.parent_device_id
-                service_run = db.factory("run", commit=True, **kwargs)
-                results = service_run.run(payload)
-                if not results:
-                    continue
+            return results
+
+        def get_run_kwargs(service):
+            kwargs = {
+                "service": run.placeholder.id
+                if service["scoped_name"] == "Placeholder"
+                else service["id"],
+                "workflow": self.id,
+                "restart_run": restart_run,
+                "parent": run,
+                "parent_runtime": run.parent_runtime,
+            }
+            if tracking_bfs or device:
+                kwargs["target_devices"] = self.get_device_ids(
+                    index, targets[service["name"]]
+                )
+            if run.parent_device_id:
+                kwargs["parent_device"] = run.parent_device_id
+            return kwargs
+
+        def get_successors(service, results):
+            completed.add(service["id"])
             status = "success" if results["success"] else "failure"
             summary = results.get("summary", {})
             if not tracking_bfs and not device:
@@ -163,24 +239,72 @@ class Workflow(Service):
                     continue
                 if tracking_bfs and not summary[edge_type]:
                     continue
-                for successor, edge in service.neighbors(
-                    self, "destination", edge_type
-                ):
+                for successor_id, edge_id in index["successors"][
+                    (service["id"], edge_type)
+                ]:
+                    successor = index["services"][successor_id]
                     if tracking_bfs or device:
-                        targets[successor.name] |= set(summary[edge_type])
-                    services.append(successor)
+                        targets[successor["name"]] |= set(summary[edge_type])
+                    yield successor
                     if tracking_bfs or device:
                         run.write_state(
-                            f"edges/{edge.id}", len(summary[edge_type]), "increment"
+                            f"edges/{edge_id}", len(summary[edge_type]), "increment"
                         )
                     else:
-                        run.write_state(f"edges/{edge.id}", "DONE")
+                        run.write_state(f"edges/{edge_id}", "DONE")
+
+        if self.parallel_branches:
+            with ThreadPoolExecutor(self.max_parallel_branches) as executor:
+                running = {}
+                while services or running:
+                    if run.stop:
+                        return {
+                            "payload": payload,
+                            "success": False,
+                            "result": "Stopped",
+                        }
+                    while services:
+                        service = services.pop()
+                        if not is_ready(service):
+                            continue
+                        results = get_skip_results(service)
+                        if results:
+                            services.extend(get_successors(service, results))
+                        else:
+                            kwargs = get_run_kwargs(service)
+                            for property in ("parent", "restart_run"):
+                                kwargs[property] = getattr(kwargs[property], "id", None)
+                            future = executor.submit(self.run_branch, kwargs, payload)
+                            running[future] = service
+                    if not running:
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        service, results = running.pop(future), future.result()
+                        if results:
+                            services.extend(get_successors(service, results))
+        else:
+            while services:
+                if run.stop:
+                    return {"payload": payload, "success": False, "result": "Stopped"}
+                service = services.pop()
+                if not is_ready(service):
+                    continue
+                results = get_skip_results(service)
+                if not results:
+                    service_run = db.factory(
+                        "run", commit=True, **get_run_kwargs(service)
+                    )
+                    results = service_run.run(payload)
+                    if not results:
+                        continue
+                services.extend(get_successors(service, results))
         if tracking_bfs or device:
-            failed = list(targets[start.name] - targets[end.name])
-            summary = {"success": list(targets[end.name]), "failure": failed}
+            failed = list(targets[start["name"]] - targets[end["name"]])
+            summary = {"success": list(targets[end["name"]]), "failure": failed}
             results = {"payload": payload, "success": not failed, "summary": summary}
         else:
-            results = {"payload": payload, "success": end in visited}
+            results = {"payload": payload, "success": end["id"] in visited}
         db.session.refresh(run)
         run.restart_run = restart_run
         return results
@@ -189,6 +313,10 @@ class Workflow(Service):
 class WorkflowForm(ServiceForm):
     form_type = HiddenField(default="workflow")
     close_connection = BooleanField(default=False)
+    parallel_branches = BooleanField("Run Independent Branches in Parallel")
+    max_parallel_branches = IntegerField(
+        "Maximum Number of Parallel Branches", default=5
+    )
     run_method = SelectField(
         "Run Method",
         choices=(
@@ -29,6 +29,8 @@ import {
   workflow,
 } from "./workflow.js";
 
+let logStreaming = !!window.EventSource;
+
 function openServicePanel(bulk) {
   showInstancePanel($("#service-type").val(), null, bulk ? "bulk" : null, "service");
 }
@@ -431,7 +433,9 @@ function refreshLogs(service, runtime, editor, first, wasRefreshed, line) {
         editor.setValue(`Gathering logs for '${service.name}'...\n\n${result.logs}`);
         editor.refresh();
       }
-      if (first || result.refresh) {
+      if (result.refresh && logStreaming) {
+        streamLogs(service, runtime, editor, result.line);
+      } else if (first || result.refresh) {
         setTimeout(
           () =>
             refreshLogs(service, runtime, editor, false, result.refresh, result.line),
@@ -446,6 +450,31 @@ function refreshLogs(service, runtime, editor, first, wasRefreshed, line) {
   });
 }
 
+function streamLogs(service, runtime, editor, line) {
+  const source = new EventSource(
+    `/stream_service_logs/${service.id}/${runtime}/${line || 0}`
+  );
+  const isDisplayed = () =>
+    $(`#service-logs-${service.id}`).length &&
+    runtime == $(`#runtimes-logs-${service.id}`).val();
+  source.onmessage = function (event) {
+    if (!isDisplayed()) return source.close();
+    line = event.lastEventId;
+    // eslint-disable-next-line new-cap
+    editor.replaceRange(`\n${event.data}`, CodeMirror.Pos(editor.lineCount()));
+    editor.setCursor(editor.lineCount(), 0);
+  };
+  source.addEventListener("end", function () {
+    source.close();
+    if (isDisplayed()) refreshLogs(service, runtime, editor, false, true);
+  });
+  source.onerror = function () {
+    if (source.readyState != EventSource.CLOSED) return;
+    logStreaming = false;
+    if (isDisplayed()) refreshLogs(service, runtime, editor, false, true, line);
+  };
+}
+
 export const normalRun = function (id) {
   call({
     url: `/run_service/${id}`,
@@ -17,6 +17,7 @@ ignored_endpoints = [
     "/logs_form",
     "/result_form",
     "/session_log_form",
+    "/stream_service_logs",
     "/table_form",
     "/tree_form",
     "/workflow_tree_form",
@@ -45,8 +45,9 @@ def test_netmiko_napalm_config(user_client):
 
 @check_pages("changelog_table")
 def test_create_logs(user_client):
+    db.flush_changelog()
     number_of_logs = len(db.fetch_all("changelog"))
     for i in range(10):
         app.log("warning", str(i))
-    db.session.commit()
-    assert len(db.fetch_all("changelog")) == number_of_logs + 11
+    db.flush_changelog()
+    assert len(db.fetch_all("changelog")) == number_of_logs + 10
@@ -141,3 +141,36 @@ def test_pool_management(user_client):
     assert len(p2.devices) == 12
     assert len(p2.links) == 4
     assert len(db.fetch_all("pool")) == pool_number + 2
+
+
+@check_pages("device_table")
+def test_incremental_pool_update(user_client):
+    create_from_file(user_client, "europe.xls")
+    user_client.post("/update/pool", data=create_pool(pool2))
+    pool = db.fetch("pool", name="pool2")
+    device = next(device for device in pool.devices)
+    device.location = "germany"
+    db.session.commit()
+    user_client.post("/update_all_pools")
+    pool = db.fetch("pool", name="pool2")
+    assert device not in pool.devices
+    assert pool.device_number == len(pool.devices) == 11
+
+
+@check_pages("device_table")
+def test_dependency_aware_pool_update(user_client):
+    create_from_file(user_client, "europe.xls")
+    user_client.post("/update/pool", data=create_pool(pool1))
+    pool = db.fetch("pool", name="pool1")
+    device, last_computed = pool.devices[0], pool.last_computed
+    with db.tracked_changes() as changes:
+        device.icon = "switch"
+        db.session.commit()
+    app.update_pools_from_changes(changes)
+    assert pool.last_computed == last_computed
+    with db.tracked_changes() as changes:
+        device.location = "germany"
+        db.session.commit()
+    app.update_pools_from_changes(changes)
+    assert pool.last_computed != last_computed
+    assert device not in pool.devices